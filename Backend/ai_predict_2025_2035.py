@@ -1,3 +1,4 @@
+import argparse
 from pathlib import Path
 import numpy as np
 import pandas as pd
@@ -8,6 +9,8 @@ from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures
 from sklearn.linear_model import Ridge
 from sklearn.pipeline import Pipeline
 
+from profiling import StageTimer, run_profiled_cli
+
 IN_PATH = Path("data/processed/loaded_full.csv")   # adjust if your file lives elsewhere
 OUT_DIR = Path("data/processed")
 
@@ -101,6 +104,14 @@ def _prepare_training(long_df: pd.DataFrame) -> pd.DataFrame:
         raise RuntimeError("No training rows found. Ensure loaded_full.csv has values for anchor years.")
     return train
 
+def _prepare_training_from_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Country-year means with a 'weight' (= row count) column, from stream_ingest.
+    Fitting these with sample weights gives the same Ridge solution as fitting every raw row.
+    """
+    train = stats.rename(columns={"count": "weight"})[["country", "year", "value", "weight"]]
+    return _prepare_training(train)
+
 def _build_ohe():
     """Create OneHotEncoder compatible across sklearn versions."""
     try:
@@ -109,7 +120,9 @@ def _build_ohe():
         return OneHotEncoder(handle_unknown="ignore", sparse=False)         # sklearn <= 1.1
 
 def _fit_model(train_df: pd.DataFrame) -> Pipeline:
-    year0 = train_df["year"].mean()
+    # Optional 'weight' column: rows stand for that many observations (see _prepare_training_from_stats)
+    weights = train_df["weight"].to_numpy(dtype=float) if "weight" in train_df.columns else None
+    year0 = np.average(train_df["year"].to_numpy(dtype=float), weights=weights)
     train_df = train_df.copy()
     train_df["year_c"] = train_df["year"] - year0
 
@@ -131,7 +144,7 @@ def _fit_model(train_df: pd.DataFrame) -> Pipeline:
 
     X = train_df[["country", "year_c"]]
     y = train_df["value"].astype(float)
-    pipe.fit(X, y)
+    pipe.fit(X, y, **({"model__sample_weight": weights} if weights is not None else {}))
 
     # save the center so _predict_for_years can reproduce year_c
     pipe.named_steps["pre"].year_center_ = float(year0)
@@ -156,30 +169,45 @@ def _predict_for_years(pipe, countries: list[str], years: list[int]) -> pd.DataF
 
 # ----------------- Main -----------------
 
-def main_predict():
-    if not IN_PATH.exists():
-        raise FileNotFoundError(f"Expected {IN_PATH.resolve()} to exist.")
+def main_predict(stages: StageTimer | None = None, in_path: Path = IN_PATH,
+                 stream: bool = False, chunksize: int | None = None):
+    stages = stages or StageTimer(enabled=False)
+    if not in_path.exists():
+        raise FileNotFoundError(f"Expected {in_path.resolve()} to exist.")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    wide_or_long = pd.read_csv(IN_PATH)
-    long_df = _to_long_country_year_value(wide_or_long)
-    train = _prepare_training(long_df)
-
-    pipe = _fit_model(train)
-    countries = sorted(train["country"].unique())
-    preds = _predict_for_years(pipe, countries, PRED_YEARS)
-
-    # ***** CHANGED: filenames reflect 2025_2030 *****
-    out_country = OUT_DIR / "ai_country_year_predictions_2025_2030_from_full.csv"
-    preds.to_csv(out_country, index=False, encoding="utf-8")
-
-    global_year = (
-        preds.groupby("year", as_index=False)["ghi_pred"]
-             .mean()
-             .rename(columns={"ghi_pred": "global_ghi_mean"})
-    )
-    out_global = OUT_DIR / "ai_global_year_predictions_2025_2030_from_full.csv"
-    global_year.to_csv(out_global, index=False, encoding="utf-8")
+    if stream:
+        # Bounded-memory path for large inputs: read + normalize + aggregate chunk by chunk
+        from stream_ingest import DEFAULT_CHUNKSIZE, print_summary, stream_ingest
+        with stages("ingest"):
+            ingest = stream_ingest(in_path, chunksize=chunksize or DEFAULT_CHUNKSIZE)
+            train = _prepare_training_from_stats(ingest.stats)
+        print_summary(ingest)
+    else:
+        with stages("read"):
+            wide_or_long = pd.read_csv(in_path)
+        with stages("melt"):
+            long_df = _to_long_country_year_value(wide_or_long)
+            train = _prepare_training(long_df)
+
+    with stages("fit"):
+        pipe = _fit_model(train)
+    with stages("predict"):
+        countries = sorted(train["country"].unique())
+        preds = _predict_for_years(pipe, countries, PRED_YEARS)
+
+    with stages("write"):
+        # ***** CHANGED: filenames reflect 2025_2030 *****
+        out_country = OUT_DIR / "ai_country_year_predictions_2025_2030_from_full.csv"
+        preds.to_csv(out_country, index=False, encoding="utf-8")
+
+        global_year = (
+            preds.groupby("year", as_index=False)["ghi_pred"]
+                 .mean()
+                 .rename(columns={"ghi_pred": "global_ghi_mean"})
+        )
+        out_global = OUT_DIR / "ai_global_year_predictions_2025_2030_from_full.csv"
+        global_year.to_csv(out_global, index=False, encoding="utf-8")
 
     print(f"[OK] Wrote {out_country} (rows={len(preds):,})")
     print(f"[OK] Wrote {out_global} (rows={len(global_year):,})")
@@ -197,5 +225,20 @@ def main_predict():
     }
 
 if __name__ == "__main__":
-    main_predict()
+    ap = argparse.ArgumentParser(description="Fit the Ridge model and write 2025-2030 predictions.")
+    ap.add_argument("--profile", action="store_true",
+                    help="Write a cProfile dump and per-stage timings to data/profiles/")
+    ap.add_argument("--input", type=Path, default=IN_PATH, help="Wide or long-format CSV to train on")
+    ap.add_argument("--stream", action="store_true",
+                    help="Ingest --input in bounded-memory chunks (for large long-format extracts)")
+    ap.add_argument("--chunksize", type=int, help="Rows per chunk with --stream")
+    args = ap.parse_args()
+
+    def run(stages=None):
+        return main_predict(stages, in_path=args.input, stream=args.stream, chunksize=args.chunksize)
+
+    if args.profile:
+        run_profiled_cli("ai_predict_2025_2035", run)
+    else:
+        run()
 
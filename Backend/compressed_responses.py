@@ -0,0 +1,103 @@
+# compressed_responses.py
+# JSON responses with gzip / brotli variants picked from the Accept-Encoding header.
+# Payloads that are served often are compressed once (PrecompressedPayload); anything
+# else is compressed on the fly with cheaper settings (negotiated_response).
+
+import gzip
+import json
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 512           # smaller bodies are not worth the header overhead
+PRECOMPRESS_LEVELS = {"gzip": 9, "br": 11}
+ON_THE_FLY_LEVELS = {"gzip": 6, "br": 5}
+
+
+def supported_encodings() -> list[str]:
+    """Encodings this process can produce, in order of preference."""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def json_bytes(payload) -> bytes:
+    """Serialize like Starlette's JSONResponse so variants match the plain response byte-for-byte."""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic for a given body
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Pick the best encoding we support from an Accept-Encoding header, honouring
+    q-values (q=0 means 'not acceptable'). Returns None for identity.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for enc in supported_encodings():
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def encoded_response(body: bytes, encoding: str | None) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class PrecompressedPayload:
+    """A JSON payload serialized once, with every supported encoding built up front."""
+
+    def __init__(self, payload):
+        self.body = json_bytes(payload)
+        self.variants: dict[str, bytes] = {}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            for enc in supported_encodings():
+                self.variants[enc] = compress(self.body, enc, PRECOMPRESS_LEVELS[enc])
+
+    def response(self, request: Request) -> Response:
+        enc = choose_encoding(request.headers.get("accept-encoding"))
+        if enc in self.variants:
+            return encoded_response(self.variants[enc], enc)
+        return encoded_response(self.body, None)
+
+
+def negotiated_response(request: Request, payload) -> Response:
+    """Serialize and (if worthwhile) compress a one-off payload for this request."""
+    body = json_bytes(payload)
+    enc = choose_encoding(request.headers.get("accept-encoding"))
+    if enc and len(body) >= MIN_COMPRESS_BYTES:
+        return encoded_response(compress(body, enc, ON_THE_FLY_LEVELS[enc]), enc)
+    return encoded_response(body, None)
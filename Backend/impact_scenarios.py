@@ -0,0 +1,193 @@
+# impact_scenarios.py
+# Vectorized "illustrative impact" math used by the Calculator page.
+# Mirrors the formulas in Frontend/.../pages/Calculator.jsx, but evaluates them
+# for every country x year x parameter tuple in one NumPy pass.
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from compressed_responses import MIN_COMPRESS_BYTES, ON_THE_FLY_LEVELS, compress, json_bytes
+
+ADJ_MIN, ADJ_MAX = 0.5, 2.0        # clamp for the GHI-vs-global cost multiplier
+MIN_BASE_COST = 0.01               # USD per person per day (same floor as the page)
+PD_PER_POINT = 1e8                 # people-days needed to move global GHI by one point
+SCENARIO_CACHE_BYTES = 64 * 1024 * 1024  # serialized scenarios + compressed variants kept in the LRU
+
+
+class ScenarioParams(NamedTuple):
+    donation_usd: float
+    base_cost: float
+    sensitivity: float
+    adjust_by_ghi: bool
+    impact_elasticity: float
+    visibility: float
+
+
+class _CachedScenario:
+    """One tuple's serialized scenario, plus compressed single-tuple responses built on demand."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.variants: dict[str, bytes] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+
+def _nan_to_none(arr: np.ndarray) -> list:
+    """ndarray -> nested lists, with NaN replaced by None (JSON has no NaN)."""
+    out = arr.astype(object)
+    out[np.isnan(arr)] = None
+    return out.tolist()
+
+
+class ImpactScenarioEngine:
+    """
+    Holds the prediction grid in memory as dense arrays:
+      ghi[c, y]      country prediction (NaN where missing)
+      global_ghi[y]  global mean prediction
+    and memoizes each ScenarioParams' serialized JSON (and its compressed
+    variants) in an LRU bounded by bytes, since serializing and compressing
+    cost far more than the NumPy pass.
+    """
+
+    def __init__(self, country_df: pd.DataFrame, global_df: pd.DataFrame,
+                 value_column: str = "ghi_pred", global_column: str = "global_ghi_mean",
+                 cache_bytes: int = SCENARIO_CACHE_BYTES):
+        # Input columns follow the indicator's spec; response keys stay GHI-named for the page
+        pivot = (
+            country_df.assign(
+                year=country_df["year"].astype(int),
+                **{value_column: pd.to_numeric(country_df[value_column], errors="coerce")},
+            )
+            .pivot_table(index="country", columns="year", values=value_column, aggfunc="mean")
+            .sort_index()
+        )
+        self.countries: list[str] = [str(c) for c in pivot.index]
+        self.years = pivot.columns.to_numpy(dtype=int)
+        self.ghi = pivot.to_numpy(dtype=float)
+
+        # Prefer the published global series; fall back to the country mean
+        g = global_df.assign(year=global_df["year"].astype(int)).set_index("year")[global_column]
+        g = pd.to_numeric(g, errors="coerce").reindex(self.years)
+        fallback = np.nanmean(self.ghi, axis=0) if self.ghi.size else np.full(len(self.years), np.nan)
+        self.global_ghi = np.where(np.isnan(g.to_numpy(dtype=float)), fallback, g.to_numpy(dtype=float))
+
+        # Every response is {<baseline>, "scenarios": [<scenario>, ...]}
+        baseline = json_bytes(self.describe())
+        self._prefix = baseline[:-1] + b',"scenarios":['
+        self._suffix = b"]}"
+
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[ScenarioParams, _CachedScenario]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    # ----------------- Vectorized core -----------------
+
+    def _compute(self, params: list[ScenarioParams]) -> list[bytes]:
+        """Evaluate P parameter tuples at once; arrays are shaped (P, C, Y[, Y])."""
+        p = np.array([tuple(x) for x in params], dtype=float).T
+        donation = np.maximum(0.0, p[0])[:, None, None]
+        cost = np.maximum(MIN_BASE_COST, p[1])[:, None, None]
+        sensitivity = p[2][:, None, None]
+        adjust = p[3].astype(bool)[:, None, None]
+        elasticity = p[4][:, None]
+        visibility = p[5][:, None]
+
+        # Adjust cost by how far each country sits from the global mean
+        diff = (self.ghi - self.global_ghi[None, :])[None, :, :]
+        adj = np.clip(1.0 + sensitivity * (diff / 100.0), ADJ_MIN, ADJ_MAX)
+        adj = np.where(adjust & np.isfinite(diff), adj, 1.0)
+
+        effective_cost = cost * adj
+        people_days = donation / effective_cost
+        people_fed = np.floor(people_days)
+
+        # Tiny GHI delta, scaled by visibility, applied from the donation year onward:
+        # after[p, c, s, y] = max(0, global[y] - delta[p, c, s]) if y >= years[s]
+        delta = elasticity[:, :, None] * (people_days / PD_PER_POINT) * visibility[:, :, None]
+        from_year = self.years[None, :] >= self.years[:, None]               # (S, Y)
+        nudged = np.maximum(0.0, self.global_ghi[None, None, None, :] - delta[..., None])
+        after = np.where(from_year[None, None, :, :], nudged, self.global_ghi[None, None, None, :])
+
+        return [
+            json_bytes({
+                **params[i]._asdict(),
+                "adj_mult": adj[i].tolist(),
+                "effective_cost": effective_cost[i].tolist(),
+                "people_fed": people_fed[i].astype(np.int64).tolist(),
+                "after_global_ghi_mean": after[i].tolist(),
+            })
+            for i in range(len(params))
+        ]
+
+    # ----------------- Public API -----------------
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache fits its byte budget (lock held)."""
+        while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= old.nbytes
+
+    def _entries(self, params: list[ScenarioParams]) -> list[_CachedScenario]:
+        """One cache entry per tuple, computing only the ones not already cached."""
+        with self._lock:
+            found = {k: self._cache[k] for k in params if k in self._cache}
+            for k in found:
+                self._cache.move_to_end(k)
+        missing = list(dict.fromkeys(k for k in params if k not in found))
+
+        if missing:
+            computed = self._compute(missing)
+            with self._lock:
+                for k, body in zip(missing, computed):
+                    entry = self._cache.get(k)  # another request may have added it meanwhile
+                    if entry is None:
+                        entry = _CachedScenario(body)
+                        self._cache[k] = entry
+                        self._cached_bytes += entry.nbytes
+                    self._cache.move_to_end(k)
+                    found[k] = entry
+                self._evict()
+
+        return [found[k] for k in params]
+
+    def response_body(self, params: list[ScenarioParams], encoding: str | None) -> tuple[bytes, str | None]:
+        """
+        Full JSON response for `params`, compressed with `encoding` when worthwhile.
+        Returns (body, encoding actually used). Single-tuple responses (what the
+        Calculator sends) keep their compressed variants in the cache.
+        """
+        entries = self._entries(params)
+        body = self._prefix + b",".join(e.body for e in entries) + self._suffix
+        if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+            return body, None
+        if len(entries) > 1:
+            return compress(body, encoding, ON_THE_FLY_LEVELS[encoding]), encoding
+
+        entry = entries[0]
+        variant = entry.variants.get(encoding)
+        if variant is None:
+            variant = compress(body, encoding, ON_THE_FLY_LEVELS[encoding])
+            with self._lock:
+                if encoding not in entry.variants:
+                    entry.variants[encoding] = variant
+                    if self._cache.get(params[0]) is entry:
+                        self._cached_bytes += len(variant)
+                        self._evict()
+        return variant, encoding
+
+    def describe(self) -> dict:
+        """The baseline numbers every scenario shares."""
+        return {
+            "countries": self.countries,
+            "years": self.years.tolist(),
+            "global_ghi_mean": _nan_to_none(self.global_ghi),
+            "country_ghi_pred": _nan_to_none(self.ghi),
+        }
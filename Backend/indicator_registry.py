@@ -0,0 +1,216 @@
+# indicator_registry.py
+# Named prediction datasets ("indicators") served by the API.
+# Each indicator is read from disk once per on-disk version, held in memory with
+# its pre-compressed payloads, and can be reloaded on its own without touching
+# the others (a new IndicatorDataset is built, then swapped in).
+
+import json
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+
+from compressed_responses import PrecompressedPayload
+
+PROCESSED_DIR = Path("data/processed")
+INDICATORS_CONFIG = Path("data/indicators.json")  # optional extra indicators
+
+
+class IndicatorSpec(NamedTuple):
+    name: str
+    country_file: Path
+    global_file: Optional[Path] = None          # None: global = mean across countries
+    value_column: str = "ghi_pred"
+    global_column: Optional[str] = None         # None: derived, e.g. stunting_pred -> global_stunting_mean
+    description: str = ""
+
+
+def _default_global_column(value_column: str) -> str:
+    """ghi_pred -> global_ghi_mean, matching the files the training script writes."""
+    base = value_column[:-len("_pred")] if value_column.endswith("_pred") else value_column
+    return f"global_{base}_mean"
+
+
+DEFAULT_INDICATORS = [
+    IndicatorSpec(
+        name="ghi",
+        country_file=PROCESSED_DIR / "ai_country_year_predictions_2025_2030_from_full.csv",
+        global_file=PROCESSED_DIR / "ai_global_year_predictions_2025_2030_from_full.csv",
+        description="Global Hunger Index predictions, 2025-2030",
+    ),
+    IndicatorSpec(
+        name="ghi_2035",
+        country_file=PROCESSED_DIR / "ai_country_year_predictions_2025_2035_from_full.csv",
+        global_file=PROCESSED_DIR / "ai_global_year_predictions_2025_2035_from_full.csv",
+        description="Global Hunger Index predictions, 2025-2035",
+    ),
+]
+
+
+def file_version(*paths: Optional[Path]) -> tuple:
+    """Cheap on-disk version stamp: changes whenever a file is rewritten."""
+    out = []
+    for p in paths:
+        st = p.stat() if p is not None and p.exists() else None
+        out.append((st.st_mtime_ns, st.st_size) if st else None)
+    return tuple(out)
+
+def _require_csv(path: Path) -> pd.DataFrame:
+    if not path.exists():
+        raise HTTPException(status_code=400, detail=f"Missing file: {path.resolve()}")
+    try:
+        return pd.read_csv(path)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read {path.name}: {e}")
+
+def _read_table(path: Path, columns: tuple) -> pd.DataFrame:
+    df = _require_csv(path)
+    if any(c not in df.columns for c in columns):
+        raise HTTPException(
+            status_code=400,
+            detail=f"{path.name} must contain columns " + " and ".join(f"'{c}'" for c in columns)
+        )
+    df = df[list(columns)].copy()
+    df["year"] = df["year"].astype(int)
+    for col in columns:
+        if col not in ("country", "year"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+def _build_payloads(df: pd.DataFrame) -> dict:
+    """Pre-compress what the frontend asks for most: the whole table (key None) and each single year."""
+    payloads = {None: PrecompressedPayload(df.to_dict(orient="records"))}
+    for y, sub in df.groupby("year"):
+        payloads[int(y)] = PrecompressedPayload(sub.to_dict(orient="records"))
+    return payloads
+
+
+class IndicatorDataset:
+    """One indicator's country and global tables, held in memory for a given on-disk version."""
+
+    def __init__(self, spec: IndicatorSpec, version: tuple):
+        self.spec = spec
+        self.version = version
+        self.country_df = _read_table(spec.country_file, ("country", "year", spec.value_column))
+        if spec.global_file is not None:
+            self.global_df = _read_table(spec.global_file, ("year", spec.global_column))
+        else:
+            self.global_df = (
+                self.country_df.groupby("year", as_index=False)[spec.value_column]
+                    .mean()
+                    .rename(columns={spec.value_column: spec.global_column})
+            )
+        self.country_payloads = _build_payloads(self.country_df)
+        self.global_payloads = _build_payloads(self.global_df)
+
+    def describe(self) -> dict:
+        years = self.country_df["year"]
+        return {
+            "countries": int(self.country_df["country"].nunique()),
+            "years": [int(years.min()), int(years.max())] if len(years) else [],
+            "rows": len(self.country_df),
+        }
+
+
+class IndicatorRegistry:
+    def __init__(self, specs: list[IndicatorSpec] = ()):
+        self._specs: dict[str, IndicatorSpec] = {}
+        self._datasets: dict[str, IndicatorDataset] = {}
+        self._failed_versions: dict[str, tuple] = {}   # on-disk version that last failed to load
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: IndicatorSpec):
+        """Add or replace an indicator; its data is (re)loaded on next use."""
+        if spec.global_column is None:
+            spec = spec._replace(global_column=_default_global_column(spec.value_column))
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._datasets.pop(spec.name, None)
+            self._failed_versions.pop(spec.name, None)
+            self._load_locks.setdefault(spec.name, threading.Lock())
+
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    def spec(self, name: str) -> IndicatorSpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown indicator: {name}")
+
+    def get(self, name: str, force_reload: bool = False) -> IndicatorDataset:
+        """
+        Return the in-memory dataset, loading it when missing or when its files
+        changed. Loads for one indicator never block requests for another.
+        If the files changed but fail to load (e.g. caught mid-write), the last good
+        version keeps being served and that on-disk version is not retried; only a
+        forced reload (or a first load) raises the error.
+        """
+        spec = self.spec(name)
+        version = file_version(spec.country_file, spec.global_file)
+
+        def usable(ds: Optional[IndicatorDataset]) -> bool:
+            if ds is None or force_reload:
+                return False
+            return ds.version == version or self._failed_versions.get(name) == version
+
+        current = self._datasets.get(name)
+        if usable(current):
+            return current
+
+        with self._load_locks[name]:
+            current = self._datasets.get(name)  # another thread may have just loaded it
+            if usable(current):
+                return current
+            try:
+                fresh = IndicatorDataset(spec, version)
+            except Exception as e:
+                if current is None or force_reload:
+                    raise
+                self._failed_versions[name] = version
+                detail = e.detail if isinstance(e, HTTPException) else e
+                print(f"[WARN] Reloading indicator '{name}' failed, keeping the previous version: {detail}")
+                return current
+            with self._lock:
+                if self._specs.get(name) is spec:
+                    self._datasets[name] = fresh
+                    self._failed_versions.pop(name, None)
+            return fresh
+
+    def describe(self) -> list[dict]:
+        out = []
+        for name, spec in self._specs.items():
+            ds = self._datasets.get(name)
+            out.append({
+                "name": name,
+                "description": spec.description,
+                "value_column": spec.value_column,
+                "global_column": spec.global_column,
+                "loaded": ds is not None,
+                **(ds.describe() if ds is not None else {}),
+            })
+        return out
+
+
+def load_indicator_specs(config: Path = INDICATORS_CONFIG) -> list[IndicatorSpec]:
+    """
+    DEFAULT_INDICATORS plus any listed in data/indicators.json, e.g.
+      [{"name": "stunting", "country_file": "data/processed/stunting_country_year.csv",
+        "value_column": "stunting_pred"}]
+    Entries with an existing name replace the default; global_column defaults to
+    global_<value>_mean (see _default_global_column).
+    """
+    specs = {s.name: s for s in DEFAULT_INDICATORS}
+    if config.exists():
+        for entry in json.loads(config.read_text(encoding="utf-8")):
+            entry = dict(entry)
+            entry["country_file"] = Path(entry["country_file"])
+            if entry.get("global_file"):
+                entry["global_file"] = Path(entry["global_file"])
+            specs[entry["name"]] = IndicatorSpec(**entry)
+    return list(specs.values())
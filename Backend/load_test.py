@@ -0,0 +1,329 @@
+# load_test.py
+# Local load generator for the prediction API (no external services).
+# Replays the query mix the frontend sends (see Frontend/.../lib/api.js) at a fixed
+# concurrency and reports throughput, latency percentiles and error rates.
+#
+# Usage (from the Backend folder, like `uvicorn main:app`):
+#   python load_test.py                                   # in-process ASGI, 16 workers
+#   python load_test.py --mode uvicorn --concurrency 32   # real HTTP on localhost
+#   python load_test.py --save-baseline data/loadtest_baseline.json
+#   python load_test.py --compare-baseline data/loadtest_baseline.json --tolerance 0.2
+
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+COUNTRY_FILE = Path("data/processed/ai_country_year_predictions_2025_2030_from_full.csv")
+
+# (name, weight) — roughly how often each call shows up from the pages
+QUERY_MIX = [
+    ("impact_scenarios", 40),      # Calculator: one request per input change
+    ("country_year_all_year", 35), # Home: every country for one year (4 per page load)
+    ("global_series", 10),         # Home: global trend 2025-2030 (1 per page load)
+    ("country_year_single", 4),    # no page sends these any more; kept light for API callers
+    ("country_year_multi", 4),
+    ("country_year_range", 4),
+    ("global_year", 3),
+    ("prediction_analysis", 0),    # retrains + rewrites the CSVs; opt in with --analysis-weight
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+# ----------------- Query mix -----------------
+
+def _load_universe() -> tuple[list[str], list[int]]:
+    if not COUNTRY_FILE.exists():
+        raise FileNotFoundError(f"Expected {COUNTRY_FILE.resolve()} to exist. Run from the Backend folder.")
+    df = pd.read_csv(COUNTRY_FILE, usecols=["country", "year"])
+    return sorted(df["country"].astype(str).unique()), sorted(df["year"].astype(int).unique())
+
+def _make_request(kind: str, rng: random.Random, countries: list[str], years: list[int]) -> str:
+    """Build one path+query the way lib/api.js would (comma-joined country list)."""
+    if kind == "country_year_single":
+        q = {"country": rng.choice(countries), "year": rng.choice(years)}
+        return "/predictions/country-year?" + urlencode(q)
+    if kind == "country_year_multi":
+        q = {"country": ",".join(rng.sample(countries, rng.randint(2, 6)))}
+        if rng.random() < 0.5:
+            q["year"] = rng.choice(years)
+        return "/predictions/country-year?" + urlencode(q)
+    if kind == "country_year_range":
+        sy = rng.choice(years)
+        ey = rng.choice([y for y in years if y >= sy])
+        q = {"country": rng.choice(countries), "start_year": sy, "end_year": ey}
+        return "/predictions/country-year?" + urlencode(q)
+    if kind == "country_year_all_year":
+        return "/predictions/country-year?" + urlencode({"year": rng.choice(years)})
+    if kind == "global_series":
+        return "/predictions/global-year?" + urlencode({"start_year": years[0], "end_year": years[-1]})
+    if kind == "global_year":
+        return "/predictions/global-year?" + urlencode({"year": rng.choice(years)})
+    if kind == "impact_scenarios":
+        # Same controls as the Calculator page: typed amounts, 0.05-step sliders, a checkbox
+        q = {
+            "donation_usd": round(rng.uniform(0.5, 500), 2),
+            "base_cost": round(rng.uniform(0.1, 2.0), 2),
+            "sensitivity": round(rng.randint(0, 20) * 0.05, 2),
+            "adjust_by_ghi": str(rng.random() < 0.8).lower(),
+            "impact_elasticity": round(rng.randint(0, 20) * 0.05, 2),
+            "visibility": rng.choice([1, 10, 100, 1_000, 100_000, 1_000_000]),
+        }
+        return "/predictions/impact-scenarios?" + urlencode(q)
+    if kind == "prediction_analysis":
+        return "/predictionAnalysis"
+    raise ValueError(f"Unknown query kind: {kind}")
+
+
+# ----------------- Targets -----------------
+
+class InProcessTarget:
+    """Calls the ASGI app directly — measures the app, not the network stack."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def get(self, path_qs: str) -> tuple[int, int]:
+        path, _, query = path_qs.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "root_path": "",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "headers": [(b"host", b"loadtest"), (b"accept-encoding", b"gzip, br")],
+            "client": ("127.0.0.1", 0), "server": ("loadtest", 80),
+        }
+        status, size = 0, 0
+        sent_request = False
+        done = asyncio.Event()
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        done.set()
+        return status, size
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """Real HTTP against a localhost server, one keep-alive connection per worker thread."""
+
+    def __init__(self, host: str, port: int, concurrency: int):
+        self.host, self.port = host, port
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self.local = threading.local()
+
+    def _get_blocking(self, path_qs: str) -> tuple[int, int]:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            conn.request("GET", path_qs, headers={"Accept-Encoding": "gzip, br"})
+            resp = conn.getresponse()
+            return resp.status, len(resp.read())
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+
+    async def get(self, path_qs: str) -> tuple[int, int]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, self._get_blocking, path_qs)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+def _start_uvicorn(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 15
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError(f"uvicorn did not start on 127.0.0.1:{port}")
+        time.sleep(0.05)
+    return server, thread
+
+
+# ----------------- Runner -----------------
+
+async def _run(target, plan: list[tuple[str, str]], concurrency: int, warmup: int) -> tuple[list, float]:
+    """Workers pull from a shared queue; returns ([(kind, latency_s, status)], wall_seconds)."""
+    for _, path_qs in plan[:warmup]:
+        try:
+            await target.get(path_qs)
+        except Exception:
+            pass
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan[warmup:]:
+        queue.put_nowait(item)
+    results: list = []
+
+    async def worker():
+        while True:
+            try:
+                kind, path_qs = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                status, _ = await target.get(path_qs)
+            except Exception:
+                status = 0  # connection-level failure
+            results.append((kind, time.perf_counter() - t0, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+def _summarize(results: list, wall: float) -> dict:
+    """Overall and per-kind stats. 404s are valid 'no rows' answers, not errors."""
+    def stats(rows):
+        lat = np.array([r[1] for r in rows], dtype=float) * 1000.0
+        errors = sum(1 for r in rows if r[2] == 0 or r[2] >= 500 or r[2] in (400, 422))
+        out = {"requests": len(rows), "error_rate": errors / len(rows) if rows else 0.0}
+        for p in PERCENTILES:
+            out[f"p{p}_ms"] = float(np.percentile(lat, p)) if len(lat) else 0.0
+        out["mean_ms"] = float(lat.mean()) if len(lat) else 0.0
+        return out
+
+    by_kind = defaultdict(list)
+    for r in results:
+        by_kind[r[0]].append(r)
+
+    overall = stats(results)
+    overall["throughput_rps"] = len(results) / wall if wall > 0 else 0.0
+    overall["wall_s"] = wall
+    return {"overall": overall, "by_kind": {k: stats(v) for k, v in sorted(by_kind.items())}}
+
+def _print_report(summary: dict, meta: dict):
+    o = summary["overall"]
+    print(f"\n[OK] {o['requests']:,} requests in {o['wall_s']:.2f}s "
+          f"(mode={meta['mode']}, concurrency={meta['concurrency']})")
+    print(f"     throughput={o['throughput_rps']:.1f} req/s  error_rate={o['error_rate']:.2%}  "
+          + "  ".join(f"p{p}={o[f'p{p}_ms']:.1f}ms" for p in PERCENTILES))
+    print(f"\n{'kind':<24}{'n':>7}{'err%':>8}" + "".join(f"{'p' + str(p) + '(ms)':>11}" for p in PERCENTILES))
+    for kind, s in summary["by_kind"].items():
+        print(f"{kind:<24}{s['requests']:>7}{s['error_rate'] * 100:>7.1f}%"
+              + "".join(f"{s[f'p{p}_ms']:>11.2f}" for p in PERCENTILES))
+
+def _compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return regressions: latency percentiles up, throughput down, or error rate up beyond tolerance."""
+    problems = []
+    cur, base = summary["overall"], baseline["overall"]
+    for p in PERCENTILES:
+        key = f"p{p}_ms"
+        if base.get(key) and cur[key] > base[key] * (1 + tolerance):
+            problems.append(f"overall {key}: {cur[key]:.2f} vs baseline {base[key]:.2f}")
+    if base.get("throughput_rps") and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+        problems.append(f"throughput: {cur['throughput_rps']:.1f} vs baseline {base['throughput_rps']:.1f} req/s")
+    if cur["error_rate"] > base.get("error_rate", 0.0) + 0.01:
+        problems.append(f"error_rate: {cur['error_rate']:.2%} vs baseline {base.get('error_rate', 0.0):.2%}")
+    for kind, s in summary["by_kind"].items():
+        b = baseline.get("by_kind", {}).get(kind)
+        if b and b.get("p95_ms") and s["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+            problems.append(f"{kind} p95_ms: {s['p95_ms']:.2f} vs baseline {b['p95_ms']:.2f}")
+    return problems
+
+
+# ----------------- Main -----------------
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test the prediction API locally.")
+    ap.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    ap.add_argument("--port", type=int, default=8765, help="Port for --mode uvicorn")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=2000, help="Measured requests (after warmup)")
+    ap.add_argument("--warmup", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--analysis-weight", type=float, default=0.0,
+                    help="Weight for /predictionAnalysis (retrains and rewrites the prediction CSVs)")
+    ap.add_argument("--json-out", type=Path, help="Write the full summary as JSON")
+    ap.add_argument("--save-baseline", type=Path, help="Save this run as the regression baseline")
+    ap.add_argument("--compare-baseline", type=Path, help="Fail (exit 1) on regression vs this baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    from main import app  # imported here so --help works without the data files
+
+    countries, years = _load_universe()
+    mix = [(k, args.analysis_weight if k == "prediction_analysis" else w) for k, w in QUERY_MIX]
+    kinds, weights = zip(*[(k, w) for k, w in mix if w > 0])
+
+    rng = random.Random(args.seed)
+    total = args.warmup + args.requests
+    plan = [(k, _make_request(k, rng, countries, years)) for k in rng.choices(kinds, weights=weights, k=total)]
+
+    server = None
+    if args.mode == "inprocess":
+        target = InProcessTarget(app)
+    else:
+        server, thread = _start_uvicorn(app, args.port)
+        target = HttpTarget("127.0.0.1", args.port, args.concurrency)
+
+    try:
+        results, wall = asyncio.run(_run(target, plan, args.concurrency, args.warmup))
+    finally:
+        target.close()
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    meta = {"mode": args.mode, "concurrency": args.concurrency, "requests": args.requests, "seed": args.seed}
+    summary = {"meta": meta, **_summarize(results, wall)}
+    _print_report(summary, meta)
+
+    if args.json_out:
+        args.json_out.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"\n[OK] Wrote {args.json_out}")
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"\n[OK] Saved baseline to {args.save_baseline}")
+    if args.compare_baseline:
+        baseline = json.loads(args.compare_baseline.read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("mode") != args.mode:
+            print(f"[WARN] Baseline mode={baseline.get('meta', {}).get('mode')} differs from this run (mode={args.mode})")
+        problems = _compare(summary, baseline, args.tolerance)
+        if problems:
+            print(f"\n[FAIL] Regressions beyond {args.tolerance:.0%} tolerance:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print(f"\n[OK] No regressions beyond {args.tolerance:.0%} vs {args.compare_baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,34 @@
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from setup_and_preprocess import load_dataframe
-from pathlib import Path
 from ai_predict_2025_2035 import main_predict
+from impact_scenarios import ImpactScenarioEngine, ScenarioParams
+from compressed_responses import choose_encoding, encoded_response, negotiated_response
+from indicator_registry import IndicatorDataset, IndicatorRegistry, load_indicator_specs
+from profiling import (
+    PROFILE_REQUEST, ProfileRequest, list_profiles, parse_profile_mode, profiled, resolve_profile,
+)
+from itertools import product
+import math
+import os
 from typing import List, Optional
 import pandas as pd
 
 
-# === Files produced by your training script ===
-COUNTRY_FILE = Path("data/processed/ai_country_year_predictions_2025_2030_from_full.csv")
-GLOBAL_FILE  = Path("data/processed/ai_global_year_predictions_2025_2030_from_full.csv")
+# === Datasets produced by your training script (see indicator_registry.py) ===
+registry = IndicatorRegistry(load_indicator_specs())
+DEFAULT_INDICATOR = "ghi"        # served under /predictions/...
+
+# The Calculator page covers 2025..2035, so the scenario engine reads the longer run
+SCENARIO_INDICATOR = "ghi_2035"
+# Each scenario returns a (countries x years x years) after-donation grid, so the cap is on
+# output cells: ~16 scenarios at 130 countries x 11 years (~5 MB of JSON)
+MAX_SCENARIO_CELLS = 260_000
+MAX_DONATION_USD = 1e12  # keeps people_fed well inside int64
+
+# Debug mode enables per-request profiling (?profile=1|cprofile|sample or X-Profile header)
+DEBUG = os.getenv("API_DEBUG", "0").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="Global Hunger Predictions")
 
@@ -23,14 +42,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def _require_csv(path: Path) -> pd.DataFrame:
-    if not path.exists():
-        raise HTTPException(status_code=400, detail=f"Missing file: {path.resolve()}")
-    try:
-        return pd.read_csv(path)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to read {path.name}: {e}")
-
 def _split_countries_param(countries: Optional[List[str]]) -> Optional[List[str]]:
     if not countries:
         return None
@@ -50,6 +61,58 @@ def _split_countries_param(countries: Optional[List[str]]) -> Optional[List[str]
             uniq.append(c)
     return uniq or None
 
+def _filter_years(df: pd.DataFrame, year: Optional[int], start_year: Optional[int],
+                  end_year: Optional[int]) -> pd.DataFrame:
+    if year is not None:
+        df = df[df["year"] == int(year)]
+
+    if start_year is not None or end_year is not None:
+        sy = int(start_year) if start_year is not None else df["year"].min()
+        ey = int(end_year) if end_year is not None else df["year"].max()
+        df = df[(df["year"] >= sy) & (df["year"] <= ey)]
+    return df
+
+def _country_year_response(request: Request, ds: IndicatorDataset, country, year, start_year, end_year):
+    """Shared by /predictions/country-year and /indicators/{name}/country-year."""
+    wanted = _split_countries_param(country)
+    if not wanted and start_year is None and end_year is None and year in ds.country_payloads:
+        return ds.country_payloads[year].response(request)
+
+    # Uncommon filter combination: filter, then compress on the fly
+    df = ds.country_df
+    if wanted:
+        wanted_lower = {c.lower() for c in wanted}
+        df = df[df["country"].astype(str).str.lower().isin(wanted_lower)]
+    df = _filter_years(df, year, start_year, end_year)
+
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No rows match your filters.")
+    return negotiated_response(request, df.to_dict(orient="records"))
+
+def _global_year_response(request: Request, ds: IndicatorDataset, year, start_year, end_year):
+    """Shared by /predictions/global-year and /indicators/{name}/global-year."""
+    if start_year is None and end_year is None and year in ds.global_payloads:
+        return ds.global_payloads[year].response(request)
+
+    df = _filter_years(ds.global_df, year, start_year, end_year)
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No rows match your filters.")
+    return negotiated_response(request, df.to_dict(orient="records"))
+
+_scenario_engine: Optional[ImpactScenarioEngine] = None
+_scenario_dataset: Optional[IndicatorDataset] = None
+
+def _get_scenario_engine() -> ImpactScenarioEngine:
+    """Build the engine from the registry's in-memory dataset; rebuild when that dataset is swapped."""
+    global _scenario_engine, _scenario_dataset
+    ds = registry.get(SCENARIO_INDICATOR)
+    if _scenario_engine is None or ds is not _scenario_dataset:
+        _scenario_engine = ImpactScenarioEngine(
+            ds.country_df, ds.global_df, ds.spec.value_column, ds.spec.global_column
+        )
+        _scenario_dataset = ds
+    return _scenario_engine
+
 
 @app.middleware("http")
 async def no_cache_headers(request: Request, call_next):
@@ -59,10 +122,29 @@ async def no_cache_headers(request: Request, call_next):
     resp.headers["Expires"] = "0"
     return resp
 
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    mode = parse_profile_mode(request.headers.get("x-profile") or request.query_params.get("profile"))
+    if not DEBUG or mode is None:
+        return await call_next(request)
+
+    # The @profiled endpoint picks this up in its worker thread and fills in .saved
+    req = ProfileRequest(mode=mode, label=request.url.path)
+    token = PROFILE_REQUEST.set(req)
+    try:
+        resp = await call_next(request)
+    finally:
+        PROFILE_REQUEST.reset(token)
+    if req.saved is not None:
+        resp.headers["X-Profile-Id"] = req.saved.name
+    return resp
+
 
 
 @app.get("/predictions/country-year")
+@profiled
 def get_country_year_predictions(
+    request: Request,
     country: Optional[List[str]] = Query(
         default=None,
         description="Filter by country (repeat param or comma-separated: ?country=India&country=USA or ?country=India,USA)"
@@ -74,41 +156,15 @@ def get_country_year_predictions(
     """
     Returns per-country predictions from ai_country_year_predictions_2025_2030_from_full.csv
     Response items look like: {"country": "India", "year": 2029, "ghi_pred": 27.4}
+    The full table and single-year slices are served from pre-compressed variants.
     """
-    df = _require_csv(COUNTRY_FILE)
-
-    # Basic schema checks
-    for col in ("country", "year", "ghi_pred"):
-        if col not in df.columns:
-            raise HTTPException(status_code=400, detail=f"{COUNTRY_FILE.name} must contain column '{col}'")
-
-    # Filters
-    if country:
-        wanted = _split_countries_param(country)
-        if wanted:
-            wanted_lower = {c.lower() for c in wanted}
-            df = df[df["country"].astype(str).str.lower().isin(wanted_lower)]
-
-    if year is not None:
-        df = df[df["year"].astype(int) == int(year)]
-
-    if start_year is not None or end_year is not None:
-        sy = int(start_year) if start_year is not None else df["year"].min()
-        ey = int(end_year) if end_year is not None else df["year"].max()
-        df = df[(df["year"].astype(int) >= sy) & (df["year"].astype(int) <= ey)]
-
-    if df.empty:
-        raise HTTPException(status_code=404, detail="No rows match your filters.")
-
-    # Ensure proper types
-    df["year"] = df["year"].astype(int)
-    df["ghi_pred"] = pd.to_numeric(df["ghi_pred"], errors="coerce")
-
-    # Return as a plain JSON array of records
-    return df[["country", "year", "ghi_pred"]].to_dict(orient="records")
+    ds = registry.get(DEFAULT_INDICATOR)
+    return _country_year_response(request, ds, country, year, start_year, end_year)
 
 @app.get("/predictions/global-year")
+@profiled
 def get_global_year_predictions(
+    request: Request,
     year: Optional[int] = Query(default=None, description="Exact year filter (e.g., 2030)"),
     start_year: Optional[int] = Query(default=None, description="Inclusive start of year range"),
     end_year: Optional[int] = Query(default=None, description="Inclusive end of year range"),
@@ -117,36 +173,127 @@ def get_global_year_predictions(
     Returns global mean predictions per year from ai_global_year_predictions_2025_2035_from_full.csv
     Response items look like: {"year": 2029, "global_ghi_mean": 21.8}
     """
-    df = _require_csv(GLOBAL_FILE)
+    ds = registry.get(DEFAULT_INDICATOR)
+    return _global_year_response(request, ds, year, start_year, end_year)
 
-    if "year" not in df.columns or "global_ghi_mean" not in df.columns:
-        raise HTTPException(
-            status_code=400,
-            detail=f"{GLOBAL_FILE.name} must contain columns 'year' and 'global_ghi_mean'"
-        )
+def _check_range(name: str, values: List[float], lo: float, hi: Optional[float] = None,
+                 lo_inclusive: bool = True):
+    """400 unless every value is finite and inside [lo, hi] (or (lo, hi] when lo_inclusive=False)."""
+    for v in values:
+        too_low = v < lo if lo_inclusive else v <= lo
+        if not math.isfinite(v) or too_low or (hi is not None and v > hi):
+            bound = f"{'[' if lo_inclusive else '('}{lo:g}, {hi:g}]" if hi is not None else \
+                    f"{'>=' if lo_inclusive else '>'} {lo:g}"
+            raise HTTPException(status_code=400, detail=f"{name} must be finite and {bound}; got {v}")
 
-    if year is not None:
-        df = df[df["year"].astype(int) == int(year)]
 
-    if start_year is not None or end_year is not None:
-        sy = int(start_year) if start_year is not None else df["year"].min()
-        ey = int(end_year) if end_year is not None else df["year"].max()
-        df = df[(df["year"].astype(int) >= sy) & (df["year"].astype(int) <= ey)]
+@app.get("/indicators")
+def get_indicators():
+    """Lists the registered indicators and whether each is loaded in memory."""
+    return registry.describe()
 
-    if df.empty:
-        raise HTTPException(status_code=404, detail="No rows match your filters.")
+@app.get("/indicators/{name}/country-year")
+@profiled
+def get_indicator_country_year(
+    request: Request,
+    name: str,
+    country: Optional[List[str]] = Query(default=None, description="Filter by country (repeat param or comma-separated)"),
+    year: Optional[int] = Query(default=None, description="Exact year filter"),
+    start_year: Optional[int] = Query(default=None, description="Inclusive start of year range"),
+    end_year: Optional[int] = Query(default=None, description="Inclusive end of year range"),
+):
+    """
+    Per-country predictions for one indicator.
+    Response items look like: {"country": "India", "year": 2029, "<value_column>": 27.4}
+    """
+    return _country_year_response(request, registry.get(name), country, year, start_year, end_year)
+
+@app.get("/indicators/{name}/global-year")
+@profiled
+def get_indicator_global_year(
+    request: Request,
+    name: str,
+    year: Optional[int] = Query(default=None, description="Exact year filter"),
+    start_year: Optional[int] = Query(default=None, description="Inclusive start of year range"),
+    end_year: Optional[int] = Query(default=None, description="Inclusive end of year range"),
+):
+    """
+    Global mean predictions per year for one indicator.
+    Response items look like: {"year": 2029, "<global_column>": 21.8}
+    """
+    return _global_year_response(request, registry.get(name), year, start_year, end_year)
+
+@app.post("/indicators/{name}/reload")
+def reload_indicator(name: str):
+    """Re-reads one indicator from disk and swaps it in; the others are untouched. Debug mode only."""
+    if not DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    ds = registry.get(name, force_reload=True)
+    return {"name": name, **ds.describe()}
 
-    df["year"] = df["year"].astype(int)
-    df["global_ghi_mean"] = pd.to_numeric(df["global_ghi_mean"], errors="coerce")
 
-    return df[["year", "global_ghi_mean"]].to_dict(orient="records")
+@app.get("/predictions/impact-scenarios")
+@profiled
+def get_impact_scenarios(
+    request: Request,
+    donation_usd: List[float] = Query(default=[10.0], description="Donation amount(s) in USD"),
+    base_cost: List[float] = Query(default=[0.8], description="Cost per person per day (USD)"),
+    sensitivity: List[float] = Query(default=[0.5], description="GHI cost-adjustment sensitivity (0..1)"),
+    adjust_by_ghi: List[bool] = Query(default=[True], description="Adjust cost by country GHI vs global mean"),
+    impact_elasticity: List[float] = Query(default=[0.3], description="Illustrative impact elasticity (0..1)"),
+    visibility: List[float] = Query(default=[100.0], description="Visibility zoom for the after-donation series"),
+):
+    """
+    Evaluates the Calculator's illustrative impact formulas for every country x year
+    (2025..2035) and every combination of the given parameter values.
+    Response: {"countries", "years", "global_ghi_mean", "country_ghi_pred", "scenarios": [...]},
+    where each scenario holds [country][year] grids for adj_mult, effective_cost and
+    people_fed, plus after_global_ghi_mean[country][donation_year][year].
+    """
+    _check_range("donation_usd", donation_usd, 0.0, MAX_DONATION_USD)
+    _check_range("base_cost", base_cost, 0.0, lo_inclusive=False)
+    _check_range("sensitivity", sensitivity, 0.0, 1.0)
+    _check_range("impact_elasticity", impact_elasticity, 0.0, 1.0)
+    _check_range("visibility", visibility, 0.0, lo_inclusive=False)
+
+    grid = [ScenarioParams(*combo) for combo in product(
+        donation_usd, base_cost, sensitivity, adjust_by_ghi, impact_elasticity, visibility
+    )]
+    engine = _get_scenario_engine()
+    per_scenario = max(1, len(engine.countries) * len(engine.years) ** 2)
+    if len(grid) * per_scenario > MAX_SCENARIO_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parameter grid has {len(grid)} combinations; the limit for this dataset is "
+                   f"{MAX_SCENARIO_CELLS // per_scenario}."
+        )
+    body, encoding = engine.response_body(grid, choose_encoding(request.headers.get("accept-encoding")))
+    return encoded_response(body, encoding)
 
 
 @app.get("/")
 def root_read():
     return {"status": "Health Check Successful!"}
 
+@app.get("/debug/profiles")
+def get_profiles():
+    """Lists stored profiles (newest first). Only available when API_DEBUG is set."""
+    if not DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return list_profiles()
+
+@app.get("/debug/profiles/{name}")
+def download_profile(name: str):
+    """Downloads one profile: .prof (pstats / snakeviz) or .collapsed.txt (flamegraph)."""
+    if not DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    path = resolve_profile(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No such profile: {name}")
+    return FileResponse(path, filename=path.name)
+
 @app.get("/predictionAnalysis")
+@profiled
 def predict_hunger():
     # EXCEL_PATH = Path("data/2024.xlsx")
     # df = load_dataframe(EXCEL_PATH)
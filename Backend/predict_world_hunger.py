@@ -2,11 +2,15 @@
 # Minimal deps: pandas, numpy  (no sklearn needed)
 # Usage:
 #   python 02_predict_world_hunger.py
+#   python 02_predict_world_hunger.py --profile   # cProfile + per-stage timings in data/profiles/
 
+import argparse
 from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from profiling import StageTimer, run_profiled_cli
+
 IN_PATH = Path("data/processed/years_only.csv")
 OUT_DIR = Path("data/processed")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -59,68 +63,74 @@ def _fit_predict_country(years: np.ndarray, values: np.ndarray, out_years: np.nd
     pred = np.clip(pred, CLIP_MIN, CLIP_MAX)
     return pred
 
-def main_predict():
+def main_predict(stages: StageTimer | None = None):
+    stages = stages or StageTimer(enabled=False)
     if not IN_PATH.exists():
         raise FileNotFoundError(f"Expected {IN_PATH.resolve()} to exist. Run the loader first.")
-    raw = pd.read_csv(IN_PATH)
-    long_df = _melt_years(raw)
+    with stages("read"):
+        raw = pd.read_csv(IN_PATH)
+    with stages("melt"):
+        long_df = _melt_years(raw)
 
     # Keep only the four anchor years if more slipped in
     anchor_years = np.array([2000, 2008, 2016, 2024], dtype=int)
     long_df = long_df[long_df["year"].isin(anchor_years)]
 
-    # Per-country predictions
-    countries = sorted(long_df["country"].unique())
-    out_years = np.array(TARGET_YEARS, dtype=int)
-    rows = []
-
-    for c in countries:
-        sub = long_df[long_df["country"] == c].sort_values("year")
-        known_years = sub["year"].to_numpy(dtype=int)
-        known_vals  = sub["ghi"].to_numpy(dtype=float)
-        preds = _fit_predict_country(known_years, known_vals, out_years)
-        rows.append(pd.DataFrame({"country": c, "year": out_years, "ghi_pred": preds}))
-
-    country_year_pred = pd.concat(rows, ignore_index=True)
-
-    # Global aggregate (unweighted mean across countries that have a prediction that year)
-    global_year = (
-        country_year_pred
-        .groupby("year", as_index=False)["ghi_pred"]
-        .mean()
-        .rename(columns={"ghi_pred": "global_ghi_unweighted"})
-    )
-
-    # Build a daily series by time-interpolating year→day (Jan 1 of each year)
-    # This is for visualization only; GHI is an annual metric.
-    # Create a date index from the min to max year
-    start_date = f"{min(TARGET_YEARS)}-01-01"
-    end_date   = f"{max(TARGET_YEARS)}-12-31"
-
-    # Create annual date points at Jan 1 with the global value
-    annual_points = pd.Series(
-        data=global_year.set_index(pd.to_datetime(global_year["year"].astype(str) + "-01-01"))["global_ghi_unweighted"],
-        index=pd.to_datetime(global_year["year"].astype(str) + "-01-01")
-    ).sort_index()
-
-    # Daily range + time interpolation
-    daily_index = pd.date_range(start=start_date, end=end_date, freq="D")
-    global_daily = (
-        annual_points.reindex(
-            annual_points.index.union(daily_index)
-        ).interpolate(method="time").reindex(daily_index)
-    )
-    global_daily = global_daily.clip(CLIP_MIN, CLIP_MAX)
-    global_daily_df = global_daily.to_frame(name="global_ghi_daily_interp").reset_index().rename(columns={"index": "date"})
-
-    # Save outputs
-    out1 = OUT_DIR / "country_year_predictions.csv"
-    out2 = OUT_DIR / "global_year_predictions.csv"
-    out3 = OUT_DIR / "global_daily_predictions.csv"
-
-    country_year_pred.to_csv(out1, index=False)
-    global_year.to_csv(out2, index=False)
-    global_daily_df.to_csv(out3, index=False)
+    # Per-country predictions (polyfit fits and predicts in one step)
+    with stages("fit_predict"):
+        countries = sorted(long_df["country"].unique())
+        out_years = np.array(TARGET_YEARS, dtype=int)
+        rows = []
+
+        for c in countries:
+            sub = long_df[long_df["country"] == c].sort_values("year")
+            known_years = sub["year"].to_numpy(dtype=int)
+            known_vals  = sub["ghi"].to_numpy(dtype=float)
+            preds = _fit_predict_country(known_years, known_vals, out_years)
+            rows.append(pd.DataFrame({"country": c, "year": out_years, "ghi_pred": preds}))
+
+        country_year_pred = pd.concat(rows, ignore_index=True)
+
+    with stages("aggregate"):
+        # Global aggregate (unweighted mean across countries that have a prediction that year)
+        global_year = (
+            country_year_pred
+            .groupby("year", as_index=False)["ghi_pred"]
+            .mean()
+            .rename(columns={"ghi_pred": "global_ghi_unweighted"})
+        )
+
+        # Build a daily series by time-interpolating year→day (Jan 1 of each year)
+        # This is for visualization only; GHI is an annual metric.
+        # Create a date index from the min to max year
+        start_date = f"{min(TARGET_YEARS)}-01-01"
+        end_date   = f"{max(TARGET_YEARS)}-12-31"
+
+        # Create annual date points at Jan 1 with the global value
+        annual_points = pd.Series(
+            data=global_year.set_index(pd.to_datetime(global_year["year"].astype(str) + "-01-01"))["global_ghi_unweighted"],
+            index=pd.to_datetime(global_year["year"].astype(str) + "-01-01")
+        ).sort_index()
+
+        # Daily range + time interpolation
+        daily_index = pd.date_range(start=start_date, end=end_date, freq="D")
+        global_daily = (
+            annual_points.reindex(
+                annual_points.index.union(daily_index)
+            ).interpolate(method="time").reindex(daily_index)
+        )
+        global_daily = global_daily.clip(CLIP_MIN, CLIP_MAX)
+        global_daily_df = global_daily.to_frame(name="global_ghi_daily_interp").reset_index().rename(columns={"index": "date"})
+
+    with stages("write"):
+        # Save outputs
+        out1 = OUT_DIR / "country_year_predictions.csv"
+        out2 = OUT_DIR / "global_year_predictions.csv"
+        out3 = OUT_DIR / "global_daily_predictions.csv"
+
+        country_year_pred.to_csv(out1, index=False)
+        global_year.to_csv(out2, index=False)
+        global_daily_df.to_csv(out3, index=False)
 
     # Log a quick preview
     print(f"[OK] Wrote {out1} (rows={len(country_year_pred):,})")
@@ -132,4 +142,11 @@ def main_predict():
     print(global_daily_df.head(10).to_string(index=False))
 
 if __name__ == "__main__":
-    main_predict()
+    ap = argparse.ArgumentParser(description="Fit per-country linear trends and write 2000-2030 predictions.")
+    ap.add_argument("--profile", action="store_true",
+                    help="Write a cProfile dump and per-stage timings to data/profiles/")
+    args = ap.parse_args()
+    if args.profile:
+        run_profiled_cli("predict_world_hunger", main_predict)
+    else:
+        main_predict()
@@ -0,0 +1,266 @@
+# profiling.py
+# Opt-in profiling helpers (stdlib only, so the training scripts can use them too).
+#  - ProfileRequest / profiled: per-request cProfile or sampling profile, set up by
+#    the API middleware in debug mode and captured inside the endpoint's own thread.
+#  - StageTimer: per-stage wall / CPU / memory timings for the training scripts.
+#  - run_profiled_cli: wraps a main_predict() run for the --profile CLI flag.
+# Everything is written to PROFILE_DIR, keeping only the newest MAX_PROFILE_FILES.
+
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+MAX_PROFILE_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_S = 0.005
+
+
+# ----------------- Storage -----------------
+
+_retention_lock = threading.Lock()
+
+def _stat_files(directory: Path) -> list[tuple[Path, os.stat_result]]:
+    """(path, stat) for each file, skipping any deleted between listing and stat (concurrent retention)."""
+    out = []
+    for p in directory.iterdir():
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        if p.is_file():
+            out.append((p, st))
+    return out
+
+def _enforce_retention(directory: Path = PROFILE_DIR, keep: int = MAX_PROFILE_FILES):
+    with _retention_lock:
+        files = sorted(_stat_files(directory), key=lambda f: f[1].st_mtime)
+        for old, _ in files[:max(0, len(files) - keep)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+def new_profile_stem(label: str) -> str:
+    """Timestamped, collision-free file stem, e.g. 20250101T120000_ab12cd_predictions-country-year."""
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "-", label).strip("-") or "profile"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:6]}_{safe}"
+
+def list_profiles(directory: Path = PROFILE_DIR) -> list[dict]:
+    if not directory.exists():
+        return []
+    files = sorted(_stat_files(directory), key=lambda f: f[1].st_mtime, reverse=True)
+    return [{"name": p.name, "bytes": st.st_size, "modified": st.st_mtime} for p, st in files]
+
+def resolve_profile(name: str, directory: Path = PROFILE_DIR) -> Path | None:
+    """Map a file name from list_profiles() back to a path, refusing anything outside the directory."""
+    path = directory / Path(name).name
+    return path if path.is_file() else None
+
+
+# ----------------- Statistical sampler -----------------
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack every `interval` seconds and counts collapsed stacks
+    ("outer;inner;leaf count" per line, the flamegraph.pl / speedscope format).
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path):
+        lines = [f"{stack} {n}" for stack, n in self.stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+# ----------------- Per-request profiling -----------------
+
+# cProfile hooks the whole process on Python 3.12+ (sys.monitoring): a second concurrent
+# profile raises ValueError and the first would record every thread. One at a time.
+_cprofile_lock = threading.Lock()
+
+class ProfileRequest:
+    """
+    Set by the middleware; `saved` is filled in once the endpoint has been profiled.
+    A cprofile request that overlaps another one is sampled instead, and failing to
+    write the profile is only logged: profiling never fails the request itself.
+    """
+
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.saved: Path | None = None
+
+    def _save(self, path: Path, write):
+        try:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            write(path)
+            self.saved = path
+            _enforce_retention()
+        except OSError as e:
+            print(f"[WARN] Could not save profile {path.name}: {e}")
+
+    def run(self, func, *args, **kwargs):
+        stem = new_profile_stem(self.label)
+        if self.mode == "cprofile" and _cprofile_lock.acquire(blocking=False):
+            try:
+                prof = cProfile.Profile()
+                try:
+                    prof.enable()
+                except ValueError:  # some other profiler owns the hooks; sample instead
+                    prof = None
+                if prof is not None:
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        prof.disable()
+                        self._save(PROFILE_DIR / f"{stem}.prof", prof.dump_stats)
+            finally:
+                _cprofile_lock.release()
+
+        sampler = SamplingProfiler(threading.get_ident())
+        sampler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.stop()
+            self._save(PROFILE_DIR / f"{stem}.collapsed.txt", sampler.dump)
+
+PROFILE_REQUEST: ContextVar[ProfileRequest | None] = ContextVar("profile_request", default=None)
+
+def parse_profile_mode(value: str | None) -> str | None:
+    """'1'/'true' -> cprofile; 'cprofile'/'sample' as given; anything else -> None."""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ("1", "true", "yes"):
+        return "cprofile"
+    return value if value in PROFILE_MODES else None
+
+def profiled(func):
+    """
+    Endpoint decorator: when the current request asked for a profile, run the
+    endpoint under it. Profiling happens here rather than in the middleware because
+    sync endpoints run in a worker thread, which cProfile cannot see from the event loop.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        req = PROFILE_REQUEST.get()
+        if req is None:
+            return func(*args, **kwargs)
+        return req.run(func, *args, **kwargs)
+    return wrapper
+
+
+# ----------------- Training stage timings -----------------
+
+def _max_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+class StageTimer:
+    """
+    `with stages("fit"): ...` records wall, CPU and Python-heap (tracemalloc) usage
+    for the block. Disabled timers are free, so main_predict can always use one.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: list[dict] = []
+        self._started_tracing = False
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def __call__(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        mem0 = tracemalloc.get_traced_memory()[0]
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            cur, peak = tracemalloc.get_traced_memory()
+            self.stages.append({
+                "stage": name,
+                "wall_s": round(time.perf_counter() - t0, 6),
+                "cpu_s": round(time.process_time() - c0, 6),
+                "mem_delta_mb": round((cur - mem0) / 1e6, 3),
+                "mem_peak_mb": round((peak - mem0) / 1e6, 3),
+                "max_rss_mb": _max_rss_mb(),
+            })
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self) -> str:
+        rows = [f"{'stage':<12}{'wall(s)':>10}{'cpu(s)':>10}{'peak(MB)':>10}"]
+        for s in self.stages:
+            rows.append(f"{s['stage']:<12}{s['wall_s']:>10.3f}{s['cpu_s']:>10.3f}{s['mem_peak_mb']:>10.2f}")
+        return "\n".join(rows)
+
+def run_profiled_cli(label: str, main_func):
+    """Run main_func(stages=...) under cProfile and store <stem>.prof + <stem>.stages.json."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = new_profile_stem(label)
+    stages = StageTimer(enabled=True)
+    prof = cProfile.Profile()
+    try:
+        result = prof.runcall(main_func, stages=stages)
+    finally:
+        stages.close()
+        prof_path = PROFILE_DIR / f"{stem}.prof"
+        stages_path = PROFILE_DIR / f"{stem}.stages.json"
+        prof.dump_stats(prof_path)
+        stages_path.write_text(json.dumps({"label": label, "stages": stages.stages}, indent=2), encoding="utf-8")
+        _enforce_retention()
+        print(f"\n[OK] Wrote {prof_path}")
+        print(f"[OK] Wrote {stages_path}\n")
+        print(stages.report())
+    return result
@@ -0,0 +1,271 @@
+# stream_ingest.py
+# Chunked ingestion for inputs too large to load at once (e.g. subnational or
+# monthly long-format extracts). Reads the CSV in fixed-size chunks, normalizes and
+# validates each one to (country, year, value), and keeps only per-(country, year)
+# count and sum. Those are exact sufficient statistics for the Ridge fit in
+# ai_predict_2025_2035.py (country-year means weighted by count), so peak memory
+# depends on chunksize and #countries x #years, never on file size.
+#
+# Usage:
+#   python stream_ingest.py data/raw/big_long.csv --out data/processed/big_long_normalized.csv
+#   python stream_ingest.py --bench-gb 2          # synthetic multi-GB file: throughput + RSS
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from ai_predict_2025_2035 import _detect_long_target_column, _find_country_col, _normalize_cols
+from profiling import _max_rss_mb
+
+DEFAULT_CHUNKSIZE = 250_000         # rows per chunk
+YEAR_MIN, YEAR_MAX = 1900, 2100     # anything outside is rejected as a bad year
+SNIFF_ROWS = 1_000                  # rows read up front to detect the table shape
+
+
+class IngestResult(NamedTuple):
+    stats: pd.DataFrame             # country, year, count, sum, value (= mean)
+    rows_read: int
+    rows_kept: int
+    rejected: dict                  # reason -> rows
+    chunks: int
+    bytes_read: int
+    seconds: float
+    peak_rss_mb: Optional[float]    # process RSS high-water mark (ru_maxrss) after ingesting, if measurable
+
+
+def _current_rss_mb() -> Optional[float]:
+    """RSS right now; only a progress indicator, since it misses peaks inside a chunk."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ----------------- Shape detection -----------------
+
+def _plan_columns(path: Path) -> dict:
+    """
+    Look at the header and a small sample to decide how to read the file, mirroring
+    _to_long_country_year_value: wide (year columns) or long (a 'year' or 'date'
+    column plus a target column). Only the needed columns are read afterwards.
+    """
+    sample = pd.read_csv(path, nrows=SNIFF_ROWS)
+    sample.columns = _normalize_cols(sample.columns)
+    country_col = _find_country_col(sample)
+
+    year_cols = [c for c in sample.columns if str(c).isdigit()]
+    if year_cols:
+        return {"shape": "wide", "country": country_col, "years": year_cols}
+
+    time_col = "year" if "year" in sample.columns else ("date" if "date" in sample.columns else None)
+    if time_col is None:
+        raise ValueError("Could not determine table shape. Need either year columns (e.g., 2000/2008/2016/2024) or a 'year' column.")
+    target_col = _detect_long_target_column(sample.drop(columns=[c for c in ("month", "day") if c in sample.columns]))
+    if not target_col or target_col == time_col:
+        raise ValueError("Could not detect a target column in long format (looked for ghi/value/score/index).")
+    return {"shape": "long", "country": country_col, "time": time_col, "target": target_col}
+
+
+# ----------------- Per-chunk normalization -----------------
+
+def _normalize_chunk(chunk: pd.DataFrame, plan: dict, rejected: dict) -> pd.DataFrame:
+    """Chunk -> validated (country, year, value) rows; rejected rows are counted by reason."""
+    chunk.columns = _normalize_cols(chunk.columns)
+    if plan["shape"] == "wide":
+        long_df = chunk.melt(id_vars=[plan["country"]], value_vars=plan["years"],
+                             var_name="year", value_name="value")
+        long_df = long_df.rename(columns={plan["country"]: "country"})
+    else:
+        long_df = chunk.rename(columns={plan["country"]: "country", plan["time"]: "year", plan["target"]: "value"})
+        if plan["time"] == "date":
+            long_df["year"] = pd.to_datetime(long_df["year"], errors="coerce", format="ISO8601").dt.year
+
+    # Country labels repeat heavily: strip the distinct labels once, not every row
+    codes, labels = pd.factorize(long_df["country"])
+    labels = pd.Index(labels).astype(str).str.strip()
+    label_codes, names = pd.factorize(labels)
+    label_codes[labels == ""] = -1
+    codes = np.append(label_codes, -1)[codes]  # code -1 (missing) picks the appended -1
+    year = pd.to_numeric(long_df["year"], errors="coerce")
+    value = pd.to_numeric(long_df["value"], errors="coerce")
+
+    bad_country = pd.Series(codes < 0, index=long_df.index)
+    bad_year = ~bad_country & (year.isna() | (year < YEAR_MIN) | (year > YEAR_MAX) | (year % 1 != 0))
+    bad_value = ~bad_country & ~bad_year & ~np.isfinite(value.to_numpy(dtype=float, na_value=np.nan))
+    rejected["missing_country"] = rejected.get("missing_country", 0) + int(bad_country.sum())
+    rejected["bad_year"] = rejected.get("bad_year", 0) + int(bad_year.sum())
+    # A wide table has an empty cell wherever a year was not scored; that is not an error
+    if plan["shape"] == "long":
+        rejected["bad_value"] = rejected.get("bad_value", 0) + int(bad_value.sum())
+
+    keep = ~(bad_country | bad_year | bad_value).to_numpy()
+    return pd.DataFrame({
+        "country": pd.Categorical.from_codes(codes[keep], categories=names),
+        "year": year[keep].astype(int).to_numpy(),
+        "value": value[keep].astype(float).to_numpy(),
+    })
+
+
+# ----------------- Streaming pass -----------------
+
+def stream_ingest(path: Path, out_path: Optional[Path] = None,
+                  chunksize: int = DEFAULT_CHUNKSIZE, verbose: bool = False) -> IngestResult:
+    """
+    One pass over `path` in chunks of `chunksize` rows. Optionally appends the
+    normalized (country, year, value) rows to `out_path` as it goes.
+    peak_rss_mb is the process high-water mark, so it is an upper bound on the
+    ingestion peak (exact when nothing larger ran earlier in the process).
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Expected {path.resolve()} to exist.")
+    plan = _plan_columns(path)
+    usecols = [plan["country"], *plan["years"]] if plan["shape"] == "wide" else \
+              [plan["country"], plan["time"], plan["target"]]
+
+    count: Optional[pd.Series] = None   # indexed by (country, year)
+    total: Optional[pd.Series] = None
+    rejected: dict = {}
+    rows_read = rows_kept = chunks = 0
+    if out_path is not None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    reader = pd.read_csv(path, usecols=lambda c: str(c).strip() in usecols, chunksize=chunksize,
+                         dtype={plan["country"]: str}, low_memory=True)
+    for chunk in reader:
+        chunks += 1
+        rows_read += len(chunk)
+        norm = _normalize_chunk(chunk, plan, rejected)
+        rows_kept += len(norm)
+
+        # Fold this chunk's country-year sums into the running totals (bounded by C x Y)
+        g = norm.groupby(["country", "year"], observed=True)["value"].agg(["count", "sum"])
+        g.index = pd.MultiIndex.from_arrays(
+            [g.index.get_level_values(0).astype(str), g.index.get_level_values(1)], names=["country", "year"]
+        )
+        if count is None:
+            count, total = g["count"].astype(float), g["sum"]
+        else:
+            count = count.add(g["count"], fill_value=0)
+            total = total.add(g["sum"], fill_value=0)
+
+        if out_path is not None:
+            norm.to_csv(out_path, mode="w" if chunks == 1 else "a", header=chunks == 1,
+                        index=False, encoding="utf-8")
+        if verbose:
+            rss = _current_rss_mb()
+            print(f"[INFO] chunk {chunks}: rows={rows_read:,} kept={rows_kept:,}"
+                  + (f" rss={rss:.0f}MB" if rss is not None else ""))
+
+    seconds = time.perf_counter() - t0
+    if count is None:
+        stats = pd.DataFrame({"country": [], "year": [], "count": [], "sum": []})
+    else:
+        stats = pd.DataFrame({"count": count, "sum": total}).reset_index()
+    stats["count"] = stats["count"].astype(int)
+    stats["value"] = stats["sum"] / stats["count"]
+    stats = stats.sort_values(["country", "year"], ignore_index=True)
+
+    return IngestResult(
+        stats=stats, rows_read=rows_read, rows_kept=rows_kept, rejected=rejected, chunks=chunks,
+        bytes_read=path.stat().st_size, seconds=seconds, peak_rss_mb=_max_rss_mb(),
+    )
+
+def print_summary(res: IngestResult):
+    mb = res.bytes_read / 1e6
+    print(f"[OK] Ingested {res.rows_read:,} rows ({mb:,.1f} MB) in {res.chunks} chunks, {res.seconds:.2f}s")
+    if res.seconds > 0:
+        print(f"     throughput={res.rows_read / res.seconds:,.0f} rows/s  {mb / res.seconds:,.1f} MB/s")
+    print(f"     kept={res.rows_kept:,}  rejected={res.rejected}  country-years={len(res.stats):,}")
+    if res.peak_rss_mb is not None:
+        print(f"     peak RSS (process high-water mark)={res.peak_rss_mb:,.0f} MB")
+
+
+# ----------------- Synthetic benchmark -----------------
+
+def write_synthetic_long(path: Path, size_gb: float, seed: int = 0,
+                         countries: int = 130, regions: int = 40) -> int:
+    """
+    Write a subnational, monthly long-format file of roughly `size_gb`:
+    country,region,year,month,value — with a few malformed rows mixed in.
+    Written in chunks so generating it is bounded in memory too. Returns rows written.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"Country_{i:03d}" for i in range(countries)]
+    target = int(size_gb * 1e9)
+    rows, block = 0, 500_000
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("country,region,year,month,value\n")
+        while f.tell() < target:
+            c = rng.integers(0, countries, block)
+            df = pd.DataFrame({
+                "country": np.array(names, dtype=object)[c],
+                "region": rng.integers(0, regions, block),
+                "year": rng.integers(2000, 2025, block),
+                "month": rng.integers(1, 13, block),
+                "value": np.round(10 + c * 0.2 + rng.normal(0, 3, block), 2),
+            })
+            # ~0.1% bad values, like stray text in real extracts
+            bad = rng.random(block) < 0.001
+            df["value"] = df["value"].astype(object)
+            df.loc[bad, "value"] = "n/a"
+            df.to_csv(f, header=False, index=False)
+            rows += block
+    return rows
+
+def _bench(size_gb: float, chunksize: int, keep: bool, out: Optional[Path]):
+    tmpdir = Path(tempfile.mkdtemp(prefix="ingest_bench_"))
+    src = tmpdir / "synthetic_long.csv"
+    print(f"[INFO] Writing ~{size_gb} GB synthetic long-format file to {src} ...")
+    t0 = time.perf_counter()
+    # Generate in a child process so its memory does not count towards our ru_maxrss
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        rows = pool.submit(write_synthetic_long, src, size_gb).result()
+    print(f"[OK] Wrote {rows:,} rows ({src.stat().st_size / 1e9:.2f} GB) in {time.perf_counter() - t0:.1f}s")
+    try:
+        res = stream_ingest(src, out_path=out, chunksize=chunksize)
+        print_summary(res)
+    finally:
+        if not keep:
+            src.unlink(missing_ok=True)
+            tmpdir.rmdir()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Chunked, bounded-memory ingestion of wide or long CSVs.")
+    ap.add_argument("input", nargs="?", type=Path, help="CSV to ingest")
+    ap.add_argument("--out", type=Path, help="Append normalized country,year,value rows here")
+    ap.add_argument("--stats-out", type=Path, help="Write per-country-year count/sum/mean here")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    ap.add_argument("--verbose", action="store_true", help="Print progress and RSS per chunk")
+    ap.add_argument("--bench-gb", type=float, help="Generate a synthetic file of this size and ingest it")
+    ap.add_argument("--keep-bench-file", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.bench_gb:
+        _bench(args.bench_gb, args.chunksize, args.keep_bench_file, args.out)
+        return 0
+    if args.input is None:
+        ap.error("an input CSV (or --bench-gb) is required")
+
+    res = stream_ingest(args.input, out_path=args.out, chunksize=args.chunksize, verbose=args.verbose)
+    print_summary(res)
+    if args.out:
+        print(f"[OK] Wrote {args.out}")
+    if args.stats_out:
+        res.stats.to_csv(args.stats_out, index=False, encoding="utf-8")
+        print(f"[OK] Wrote {args.stats_out} (rows={len(res.stats):,})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
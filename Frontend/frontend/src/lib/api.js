@@ -27,4 +27,20 @@ export const getGlobalYearPredictions = async ({ year, start_year, end_year } =
   return data; // [{ year, global_ghi_mean }]
 };
 
+// Every param is a list; the backend evaluates all combinations in one pass
+export const getImpactScenarios = async ({
+  donation_usd, base_cost, sensitivity, adjust_by_ghi, impact_elasticity, visibility,
+} = {}) => {
+  const params = new URLSearchParams();
+  const add = (key, values) => (values ?? []).forEach(v => params.append(key, String(v)));
+  add("donation_usd", donation_usd);
+  add("base_cost", base_cost);
+  add("sensitivity", sensitivity);
+  add("adjust_by_ghi", adjust_by_ghi);
+  add("impact_elasticity", impact_elasticity);
+  add("visibility", visibility);
+  const { data } = await api.get("/predictions/impact-scenarios", { params });
+  return data; // { countries, years, global_ghi_mean, country_ghi_pred, scenarios: [...] }
+};
+
 export default api;
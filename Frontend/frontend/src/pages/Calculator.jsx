@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from "react";
-import { getCountryYearPredictions, getGlobalYearPredictions } from "../lib/api";
+import { getImpactScenarios } from "../lib/api";
 import {
   ResponsiveContainer, LineChart, Line, CartesianGrid, XAxis, YAxis, Tooltip, Legend, LabelList
 } from "recharts";
@@ -7,12 +7,14 @@ import {
 // ----- constants -----
 const YEARS = Array.from({ length: 11 }, (_, i) => 2025 + i);        // 2025..2035 (top calculator)
 const TREND_YEARS = Array.from({ length: 6 },  (_, i) => 2025 + i);  // 2025..2030 (before/after)
+const inTrend = y => y >= TREND_YEARS[0] && y <= TREND_YEARS[TREND_YEARS.length - 1];
 const nf = new Intl.NumberFormat("en-US");
 const cf = new Intl.NumberFormat("en-US", { style: "currency", currency: "USD", maximumFractionDigits: 2 });
 
 const Y_DOMAIN = [15, 20];                 // fixed axis like on Home
 const Y_TICKS  = [15, 16, 17, 18, 19, 20];
 const yFmt     = n => Number(n).toFixed(1);
+const REQUEST_DEBOUNCE_MS = 250;          // let typing settle before asking the backend
 
 
 const VISIBILITY_FACTORS = [
@@ -24,10 +26,6 @@ const VISIBILITY_FACTORS = [
   { label: "x1M", value: 1_000_000 },
 ];
 
-// “illustrative impact” constants
-const GLOBAL_POP = 8_000_000_000;  // ~8B
-const WEIGHT_UNDERN = 0.33;        // rough weight of undernourishment in GHI
-
 // donate cards
 const DONATION_ORGS = [
   { name: "UN World Food Programme", blurb: "The UN’s frontline agency against global hunger.", href: "https://donate.wfp.org/1243/donation/regular/?campaign=1517&_ga=2.264509259.575144306.1755989457-1346917639.1755989457" },
@@ -49,142 +47,94 @@ export default function Calculator() {
   const [adjustByGHI, setAdjustByGHI] = useState(true);
   const [sensitivity, setSensitivity] = useState(0.5); // 0..1
 
-  const [countries, setCountries] = useState([]);
-  const [ghiCountry, setGhiCountry] = useState(null);
-  const [ghiGlobal,  setGhiGlobal]  = useState(null);
+  const [scenario, setScenario] = useState(null); // one response covers every country × year
   const [err, setErr] = useState("");
 
-  const [loadingInit, setLoadingInit] = useState(false);
-  const [loadingData, setLoadingData] = useState(false);
+  const [loadingInit, setLoadingInit] = useState(true);
 
   // ----- before/after section state -----
-  const [baseline, setBaseline] = useState([]);
-  const [trendErr, setTrendErr] = useState("");
-  const [loadingTrend, setLoadingTrend] = useState(false);
   const [impactElasticity, setImpactElasticity] = useState(0.3); // 0..1 (illustrative)
   const [visibility, setVisibility] = useState(100);             // visual zoom
 
-  // countries list (simple: pull from one year)
+  // the parameter tuple sent to the backend (and echoed back in scenarios[0])
+  const params = useMemo(() => ({
+    donation_usd:      Math.max(0, Number(donationUSD) || 0),
+    base_cost:         Math.max(0.01, Number(baseCost) || 0.01),
+    sensitivity,
+    adjust_by_ghi:     adjustByGHI,
+    impact_elasticity: impactElasticity,
+    visibility,
+  }), [donationUSD, baseCost, adjustByGHI, sensitivity, impactElasticity, visibility]);
+
+  // the backend evaluates the impact formulas for all countries/years at once;
+  // debounced so typing a donation sends one request, not one per keystroke
   useEffect(() => {
     let alive = true;
-    (async () => {
+    const timer = setTimeout(async () => {
       try {
-        setLoadingInit(true);
-        const rows = await getCountryYearPredictions({ year: 2030 });
-        const names = [...new Set((rows || []).map(r => r?.country).filter(Boolean))].sort((a, b) => a.localeCompare(b));
+        setErr("");
+        const data = await getImpactScenarios(
+          Object.fromEntries(Object.entries(params).map(([k, v]) => [k, [v]]))
+        );
         if (!alive) return;
-        setCountries(names);
-        if (!country && names.length) setCountry(names[0]);
+        setScenario(data);
       } catch (e) {
         if (!alive) return;
-        setErr(e?.response?.data?.detail || e.message || "Failed to load countries.");
+        setScenario(prev => prev && { ...prev, scenarios: [] }); // keep the baseline, drop stale numbers
+        setErr(e?.response?.data?.detail || e.message || "Failed to load impact scenarios.");
       } finally {
         if (alive) setLoadingInit(false);
       }
-    })();
-    return () => { alive = false; };
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
+    }, REQUEST_DEBOUNCE_MS);
+    return () => { alive = false; clearTimeout(timer); };
+  }, [params]);
+
+  // the scenario for the current inputs, or null while a newer request is pending / failed
+  const current = useMemo(() => {
+    const s = scenario?.scenarios?.[0];
+    if (!s) return null;
+    return Object.keys(params).every(k => s[k] === params[k]) ? s : null;
+  }, [scenario, params]);
+
+  const countries = useMemo(
+    () => [...(scenario?.countries ?? [])].sort((a, b) => a.localeCompare(b)),
+    [scenario]
+  );
 
-  // snapshot numbers for selected country/year
   useEffect(() => {
-    if (!country) return;
-    let alive = true;
-    (async () => {
-      try {
-        setErr("");
-        setLoadingData(true);
-        const [cRows, gRows] = await Promise.all([
-          getCountryYearPredictions({ year, country: [country] }),
-          getGlobalYearPredictions({ year }),
-        ]);
-        if (!alive) return;
-        const c = Number((cRows?.[0]?.ghi_pred) ?? NaN);
-        const g = Number((gRows?.[0]?.global_ghi_mean) ?? NaN);
-        setGhiCountry(Number.isFinite(c) ? c : null);
-        setGhiGlobal(Number.isFinite(g) ? g : null);
-      } catch (e) {
-        if (!alive) return;
-        setErr(e?.response?.data?.detail || e.message || "Failed to load prediction.");
-        setGhiCountry(null); setGhiGlobal(null);
-      } finally {
-        if (alive) setLoadingData(false);
-      }
-    })();
-    return () => { alive = false; };
-  }, [country, year]);
+    if (!country && countries.length) setCountry(countries[0]);
+  }, [country, countries]);
 
-  // baseline global trend for the before/after charts
-  useEffect(() => {
-    let alive = true;
-    (async () => {
-      try {
-        setTrendErr("");
-        setLoadingTrend(true);
-        const rows = await getGlobalYearPredictions({
-          start_year: TREND_YEARS[0],
-          end_year:   TREND_YEARS[TREND_YEARS.length - 1],
-        });
-        if (!alive) return;
-        const ok = (rows || []).map(r => ({ year: Number(r.year), global_ghi_mean: Number(r.global_ghi_mean) }));
-        setBaseline(ok);
-      } catch (e) {
-        if (!alive) return;
-        setTrendErr(e?.response?.data?.detail || e.message || "Failed to load baseline trend.");
-        const v = Number.isFinite(Number(ghiGlobal)) ? Number(ghiGlobal) : 16.5;
-        setBaseline(TREND_YEARS.map(y => ({ year: y, global_ghi_mean: v })));
-      } finally {
-        if (alive) setLoadingTrend(false);
-      }
-    })();
-    return () => { alive = false; };
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
+  const ci = scenario ? scenario.countries.indexOf(country) : -1;
+  const yi = scenario ? scenario.years.indexOf(year) : -1;
+  const ghiCountry = ci >= 0 && yi >= 0 ? scenario.country_ghi_pred[ci][yi] : null;
+  const ghiGlobal  = yi >= 0 ? scenario.global_ghi_mean[yi] : null;
 
-  // top “snapshot” calculation
+  // top “snapshot” numbers for the selected country/year
   const snapshot = useMemo(() => {
-    const donation = Math.max(0, Number(donationUSD) || 0);
-    const cost = Math.max(0.01, Number(baseCost) || 0.01);
-
-    let adjMult = 1;
-    if (adjustByGHI && Number.isFinite(ghiCountry) && Number.isFinite(ghiGlobal)) {
-      const diff = Number(ghiCountry ?? NaN) - Number(ghiGlobal ?? NaN);
-      adjMult = 1 + sensitivity * (diff / 100);
-      adjMult = Math.min(Math.max(adjMult, 0.5), 2);
-    }
-
-    const effectiveCost = cost * adjMult;
-    const peopleFed = Math.floor(effectiveCost > 0 ? donation / effectiveCost : 0);
-    return { adjMult, effectiveCost, peopleFed };
-  }, [donationUSD, baseCost, adjustByGHI, sensitivity, ghiCountry, ghiGlobal]);
-
-  // before/after series (computed inside component)
-  const beforeSeries = useMemo(() => baseline, [baseline]);
+    if (!current || ci < 0 || yi < 0) return null;
+    return {
+      adjMult:       current.adj_mult[ci][yi],
+      effectiveCost: current.effective_cost[ci][yi],
+      peopleFed:     current.people_fed[ci][yi],
+    };
+  }, [current, ci, yi]);
+
+  // before/after series for the trend window
+  const beforeSeries = useMemo(() => {
+    if (!scenario) return [];
+    return scenario.years
+      .map((y, j) => ({ year: y, global_ghi_mean: scenario.global_ghi_mean[j] }))
+      .filter(r => inTrend(r.year));
+  }, [scenario]);
 
   const afterSeries = useMemo(() => {
-    if (!baseline.length) return [];
-    const cost = Math.max(0.01, Number(baseCost) || 0.01);
-
-    let adjMult = 1;
-    if (adjustByGHI && Number.isFinite(ghiCountry) && Number.isFinite(ghiGlobal)) {
-      const diff = Number(ghiCountry ?? NaN) - Number(ghiGlobal ?? NaN);
-      adjMult = 1 + sensitivity * (diff / 100);
-      adjMult = Math.min(Math.max(adjMult, 0.5), 2);
-    }
-
-    const effectiveCost = cost * adjMult;
-    const peopleDays = effectiveCost > 0 ? (Number(donationUSD) || 0) / effectiveCost : 0;
-
-    // tiny GHI delta, then scaled by visibility for presentation
-    const PD_PER_POINT = 1e8;
-    const rawDeltaPts  = impactElasticity * (peopleDays / PD_PER_POINT);
-    const visibleDelta = rawDeltaPts * visibility;
-
-    return baseline.map(r => ({
-      year: r.year,
-      global_ghi_mean: r.year >= year ? Math.max(0, r.global_ghi_mean - visibleDelta) : r.global_ghi_mean,
-    }));
-  }, [baseline, year, donationUSD, baseCost, adjustByGHI, sensitivity, ghiCountry, ghiGlobal, impactElasticity, visibility]);
+    const s = scenario?.scenarios?.[0];
+    if (!s || ci < 0 || yi < 0) return beforeSeries;
+    return scenario.years
+      .map((y, j) => ({ year: y, global_ghi_mean: s.after_global_ghi_mean[ci][yi][j] }))
+      .filter(r => inTrend(r.year));
+  }, [scenario, ci, yi, beforeSeries]);
 
   const yDomain = useMemo(() => {
     const vals = [...beforeSeries, ...afterSeries]
@@ -196,7 +146,7 @@ export default function Calculator() {
     return [Math.min(15, mn - pad), Math.max(18, mx + pad)];
   }, [beforeSeries, afterSeries]);
 
-  const disabled = loadingInit || loadingData;
+  const disabled = loadingInit;
 
   return (
     <main className="content">
@@ -260,7 +210,7 @@ export default function Calculator() {
             <div className="card">
               <h3>Data Snapshot</h3>
 
-              {loadingData ? (
+              {!snapshot ? (
                 <div className="mini-grid">
                   <div className="mini skeleton" />
                   <div className="mini skeleton" />
@@ -277,7 +227,7 @@ export default function Calculator() {
               )}
 
               <div className="big-result">
-                <div className="big-num">{nf.format(snapshot.peopleFed)}</div>
+                <div className="big-num">{snapshot ? nf.format(snapshot.peopleFed) : "—"}</div>
                 <div className="big-caption">people could be fed for one day</div>
                 <div className="big-sub">
                   with {cf.format(Number(donationUSD || 0))} in {country || "—"} ({year})
@@ -329,8 +279,6 @@ export default function Calculator() {
             </div>
           </div>
 
-          {trendErr && <p className="error">Trend data: {trendErr}</p>}
-
           <div className="charts-two">
             {/* Before */}
             <div className="card">